@@ -1,26 +1,29 @@
 from fastapi import FastAPI, APIRouter, HTTPException, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
+import math
+import re
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple
 import uuid
 from datetime import datetime
-import json
-from openai import AsyncOpenAI
+import orjson
+import httpx
+from openai import AsyncOpenAI, APIConnectionError, APITimeoutError, RateLimitError, InternalServerError
+from async_lru import alru_cache
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
 import csv
 import io
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.pdfbase import pdfutils
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfbase import pdfmetrics
+from functools import lru_cache
+
+if TYPE_CHECKING:
+    from reportlab.lib.styles import ParagraphStyle
 
 
 ROOT_DIR = Path(__file__).parent
@@ -31,8 +34,64 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Formats accepted by the export endpoint
+EXPORT_FORMATS = ("json", "csv", "pdf")
+
+# Sutra generation limits: cards per API call and concurrent in-flight calls per worker.
+# CARDS_PER_REQUEST covers every deck size the UI offers, so only larger API requests are split.
+# LLM_CONCURRENCY is per uvicorn worker; the server-wide total is workers x LLM_CONCURRENCY.
+CARDS_PER_REQUEST = 10
+SUTRA_SEM = asyncio.Semaphore(int(os.getenv("LLM_CONCURRENCY", "8")))
+
+# Prompt for generating flash cards with updated language support
+LANGUAGE_INSTRUCTION = {
+    "english": "in English",
+    "hindi": "हिंदी में",
+    "spanish": "en español",
+    "french": "en français",
+    "german": "auf Deutsch",
+    "chinese": "用中文",
+    "japanese": "日本語で",
+    "arabic": "بالعربية",
+    "gujarati": "ગુજરાતી માં",
+    "marathi": "मराठी मध्ये"
+}
+
+PROMPT_TEMPLATE = """Create {count} educational flash cards about "{topic}" {language_instruction}. 
+
+Please respond with a JSON array where each object has:
+- "front": A key term, concept, or question
+- "back": A detailed explanation, definition, or answer
+
+Format your response as valid JSON only, no additional text:
+[
+  {{"front": "term/concept", "back": "detailed explanation"}},
+  {{"front": "term/concept", "back": "detailed explanation"}}
+]"""
+
+# Appended to the prompt when a large deck is split, so parallel parts don't repeat each other
+PROMPT_PART_NOTE = """
+
+This is part {part} of {parts} of a larger deck. Divide the topic into {parts} distinct areas and only cover area {part}, so these cards do not overlap with the other parts."""
+
+# Outermost JSON array in a Sutra response that may be wrapped in prose
+JSON_ARRAY_RE = re.compile(r'\[.*\]', re.DOTALL)
+# Leading whitespace and list bullets on plain-text fallback lines
+LEADING_BULLET_RE = re.compile(r'^[\s\-•*]+')
+
+# Sutra API clients. Every request shares one connection pool; the per-key clients are
+# lightweight copies of a base client, so user-supplied keys don't each open a new pool.
+SUTRA_BASE_URL = 'https://api.two.ai/v2'
+sutra_http_client = httpx.AsyncClient(limits=httpx.Limits(max_connections=200, max_keepalive_connections=100))
+# SDK retries are off: generate_card_chunk's tenacity policy is the only one, and it waits outside SUTRA_SEM
+_sutra_base_client = AsyncOpenAI(api_key='unset', base_url=SUTRA_BASE_URL, http_client=sutra_http_client, max_retries=0)
+
+def get_sutra_client(api_key: str) -> AsyncOpenAI:
+    """Return a Sutra client for an API key, sharing the module-wide connection pool"""
+    return _sutra_base_client.with_options(api_key=api_key)
+
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -40,6 +99,8 @@ api_router = APIRouter(prefix="/api")
 
 # Define Models
 class StatusCheck(BaseModel):
+    model_config = ConfigDict(populate_by_name=True, extra='ignore')
+
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     client_name: str
     timestamp: datetime = Field(default_factory=datetime.utcnow)
@@ -48,6 +109,8 @@ class StatusCheckCreate(BaseModel):
     client_name: str
 
 class FlashCard(BaseModel):
+    model_config = ConfigDict(populate_by_name=True, extra='ignore')
+
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     front: str
     back: str
@@ -56,6 +119,8 @@ class FlashCard(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class FlashCardDeck(BaseModel):
+    model_config = ConfigDict(populate_by_name=True, extra='ignore')
+
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
     topic: str
@@ -63,17 +128,26 @@ class FlashCardDeck(BaseModel):
     cards: List[FlashCard]
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+def construct_deck(deck_doc: dict) -> FlashCardDeck:
+    """Build a FlashCardDeck from a trusted database document without revalidating it"""
+    cards = [FlashCard.model_construct(**card_doc) for card_doc in deck_doc.get("cards", [])]
+    return FlashCardDeck.model_construct(**{**deck_doc, "cards": cards})
+
 class GenerateCardsRequest(BaseModel):
     topic: str
     language: str
-    count: int = 5
+    count: int = Field(default=5, gt=0)
     sutra_api_key: str
+    cache_bust: bool = False  # Regenerate the cached cards for this topic/language/count
 
 class GenerateCardsResponse(BaseModel):
     deck: FlashCardDeck
     success: bool
     message: str
 
+class DeckIdsRequest(BaseModel):
+    deck_ids: List[str]
+
 class ExportRequest(BaseModel):
     deck_ids: List[str] = []  # Empty means export all decks
     format: str = "json"  # json, csv, pdf
@@ -85,15 +159,15 @@ async def root():
 
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
-    status_dict = input.dict()
+    status_dict = input.model_dump()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    _ = await db.status_checks.insert_one(status_obj.model_dump())
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
 async def get_status_checks():
     status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+    return [StatusCheck.model_construct(**status_check) for status_check in status_checks]
 
 @api_router.post("/test-sutra")
 async def test_sutra_api(request: dict):
@@ -103,20 +177,19 @@ async def test_sutra_api(request: dict):
         if not sutra_api_key:
             raise HTTPException(status_code=400, detail="API key is required")
         
-        client_sutra = AsyncOpenAI(
-            api_key=sutra_api_key,
-            base_url='https://api.two.ai/v2',
-        )
-
-        response = await client_sutra.chat.completions.create(
-            model='sutra-v2',
-            messages=[{ 
-                'role': 'user', 
-                'content': 'मुझे केवल एक वाक्य में उत्तर दें: आप कैसे हैं?' 
-            }],
-            max_tokens=50,
-            temperature=0
-        )
+        # The probe has no tenacity policy, so it keeps the SDK's default two retries
+        client_sutra = get_sutra_client(sutra_api_key).with_options(max_retries=2)
+
+        async with SUTRA_SEM:
+            response = await client_sutra.chat.completions.create(
+                model='sutra-v2',
+                messages=[{ 
+                    'role': 'user', 
+                    'content': 'मुझे केवल एक वाक्य में उत्तर दें: आप कैसे हैं?' 
+                }],
+                max_tokens=50,
+                temperature=0
+            )
 
         return {
             "success": True,
@@ -129,42 +202,44 @@ async def test_sutra_api(request: dict):
             "message": f"Sutra API connection failed: {str(e)}"
         }
 
-@api_router.post("/generate-cards", response_model=GenerateCardsResponse)
-async def generate_flash_cards(request: GenerateCardsRequest):
-    """Generate flash cards using Sutra API"""
+def parse_cards_content(content: str, count: int) -> List[dict]:
+    """Extract front/back card dicts from a Sutra response"""
+    # Try to extract JSON from the response
     try:
-        client_sutra = AsyncOpenAI(
-            api_key=request.sutra_api_key,
-            base_url='https://api.two.ai/v2',
-        )
-
-        # Create prompt for generating flash cards with updated language support
-        language_instruction = {
-            "english": "in English",
-            "hindi": "हिंदी में",
-            "spanish": "en español", 
-            "french": "en français",
-            "german": "auf Deutsch",
-            "chinese": "用中文",
-            "japanese": "日本語で",
-            "arabic": "بالعربية",
-            "gujarati": "ગુજરાતી માં",
-            "marathi": "मराठी मध्ये"
-        }.get(request.language.lower(), "in English")
-
-        prompt = f"""Create {request.count} educational flash cards about "{request.topic}" {language_instruction}. 
-
-Please respond with a JSON array where each object has:
-- "front": A key term, concept, or question
-- "back": A detailed explanation, definition, or answer
-
-Format your response as valid JSON only, no additional text:
-[
-  {{"front": "term/concept", "back": "detailed explanation"}},
-  {{"front": "term/concept", "back": "detailed explanation"}}
-]"""
-
-        response = await client_sutra.chat.completions.create(
+        # Look for JSON array in the response
+        match = JSON_ARRAY_RE.search(content)
+        if match:
+            cards_data = orjson.loads(match.group(0))
+        else:
+            # Fallback: treat entire content as JSON
+            cards_data = orjson.loads(content)
+    except orjson.JSONDecodeError:
+        # Fallback: create cards from text response
+        lines = content.splitlines()
+        cards_data = []
+        for i in range(0, min(len(lines), count * 2), 2):
+            if i + 1 < len(lines):
+                front = LEADING_BULLET_RE.sub('', lines[i]).rstrip()
+                back = LEADING_BULLET_RE.sub('', lines[i + 1]).rstrip()
+                if front and back:
+                    cards_data.append({"front": front, "back": back})
+    return cards_data
+
+@retry(
+    retry=retry_if_exception_type((APIConnectionError, APITimeoutError, RateLimitError, InternalServerError)),
+    stop=stop_after_attempt(3),
+    wait=wait_exponential_jitter(initial=1, max=10),
+    reraise=True,
+)
+async def generate_card_chunk(client_sutra: AsyncOpenAI, topic: str, language: str, count: int, part: int = 1, parts: int = 1) -> List[dict]:
+    """Ask Sutra for a single batch of flash cards"""
+    language_instruction = LANGUAGE_INSTRUCTION.get(language.lower(), "in English")
+    prompt = PROMPT_TEMPLATE.format(count=count, topic=topic, language_instruction=language_instruction)
+    if parts > 1:
+        prompt += PROMPT_PART_NOTE.format(part=part, parts=parts)
+
+    async with SUTRA_SEM:
+        raw_response = await client_sutra.chat.completions.with_raw_response.create(
             model='sutra-v2',
             messages=[{ 
                 'role': 'user', 
@@ -174,75 +249,115 @@ Format your response as valid JSON only, no additional text:
             temperature=0.7
         )
 
-        # Parse the response
-        content = response.choices[0].message.content.strip()
-        
-        # Try to extract JSON from the response
-        try:
-            # Look for JSON array in the response
-            start_idx = content.find('[')
-            end_idx = content.rfind(']') + 1
-            if start_idx != -1 and end_idx != 0:
-                json_content = content[start_idx:end_idx]
-                cards_data = json.loads(json_content)
-            else:
-                # Fallback: treat entire content as JSON
-                cards_data = json.loads(content)
-        except json.JSONDecodeError:
-            # Fallback: create cards from text response
-            lines = content.split('\n')
-            cards_data = []
-            for i in range(0, min(len(lines), request.count * 2), 2):
-                if i + 1 < len(lines):
-                    front = lines[i].strip().lstrip('- ').lstrip('• ')
-                    back = lines[i + 1].strip().lstrip('- ').lstrip('• ')
-                    if front and back:
-                        cards_data.append({"front": front, "back": back})
-
-        # Create FlashCard objects
-        cards = []
-        for card_data in cards_data[:request.count]:
-            card = FlashCard(
-                front=card_data.get("front", ""),
-                back=card_data.get("back", ""),
-                topic=request.topic,
-                language=request.language
-            )
-            cards.append(card)
-
-        # Create deck
-        deck = FlashCardDeck(
-            name=f"{request.topic} - {request.language.title()}",
-            topic=request.topic,
-            language=request.language,
-            cards=cards
-        )
+    # Parse the response bytes directly instead of building the SDK's response models
+    completion = orjson.loads(raw_response.content)
+    content = completion["choices"][0]["message"]["content"].strip()
+    return parse_cards_content(content, count)[:count]
+
+@alru_cache(maxsize=1024)
+async def generate_cards_data(api_key: str, topic: str, language: str, count: int) -> List[dict]:
+    """Generate front/back card dicts, cached by request parameters"""
+    client_sutra = get_sutra_client(api_key)
+
+    # Large decks are split into parallel requests of at most CARDS_PER_REQUEST cards
+    chunk_total = max(1, math.ceil(count / CARDS_PER_REQUEST))
+    base, extra = divmod(count, chunk_total)
+    chunk_sizes = [size for size in (base + (1 if i < extra else 0) for i in range(chunk_total)) if size > 0]
+    chunk_results = await asyncio.gather(*[
+        generate_card_chunk(client_sutra, topic, language, size, part, len(chunk_sizes))
+        for part, size in enumerate(chunk_sizes, start=1)
+    ])
+
+    # Drop cards repeated across parts
+    cards_data = []
+    seen_fronts = set()
+    for card_data in (card_data for chunk in chunk_results for card_data in chunk):
+        front_key = str(card_data.get("front", "")).strip().casefold()
+        if front_key in seen_fronts:
+            continue
+        seen_fronts.add(front_key)
+        cards_data.append(card_data)
+
+    # Raising keeps an unparseable reply out of the cache, since alru_cache doesn't store exceptions
+    if not cards_data:
+        raise ValueError("Sutra returned no usable flash cards")
+    return cards_data
+
+@api_router.post("/generate-cards", response_model=GenerateCardsResponse)
+async def generate_flash_cards(request: GenerateCardsRequest):
+    """Generate flash cards using Sutra API"""
+    try:
+        cache_key = (request.sutra_api_key, request.topic, request.language, request.count)
+        if request.cache_bust:
+            # Drop the cached cards so this call regenerates and re-populates them
+            generate_cards_data.cache_invalidate(*cache_key)
+        cards_data = await generate_cards_data(*cache_key)
+
+        # Build the card and deck documents directly; the fields are all set here
+        now = datetime.utcnow()
+        card_docs = [
+            {
+                "id": str(uuid.uuid4()),
+                "front": str(card_data.get("front", "")),
+                "back": str(card_data.get("back", "")),
+                "topic": request.topic,
+                "language": request.language,
+                "created_at": now
+            }
+            for card_data in cards_data[:request.count]
+        ]
+        deck_doc = {
+            "id": str(uuid.uuid4()),
+            "name": f"{request.topic} - {request.language.title()}",
+            "topic": request.topic,
+            "language": request.language,
+            "cards": card_docs,
+            "created_at": now
+        }
+
+        # Build the response model before insert_one adds "_id" to the document
+        deck = construct_deck(deck_doc)
 
         # Save to database
-        await db.flash_decks.insert_one(deck.dict())
+        await db.flash_decks.insert_one(deck_doc)
 
         return GenerateCardsResponse(
             deck=deck,
             success=True,
-            message=f"Successfully generated {len(cards)} flash cards"
+            message=f"Successfully generated {len(card_docs)} flash cards"
         )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating cards: {str(e)}")
 
-@api_router.get("/decks", response_model=List[FlashCardDeck])
+@api_router.get("/decks", response_model=None)
 async def get_all_decks():
     """Get all flash card decks"""
-    decks = await db.flash_decks.find().to_list(1000)
-    return [FlashCardDeck(**deck) for deck in decks]
+    # Decks are stored from validated models, so serve the raw documents
+    cursor = db.flash_decks.find({}, {"_id": 0}).batch_size(200)
+    decks = await cursor.to_list(1000)
+    return ORJSONResponse(content=decks)
 
-@api_router.get("/decks/{deck_id}", response_model=FlashCardDeck)
+@api_router.get("/decks/{deck_id}", response_model=None)
 async def get_deck(deck_id: str):
     """Get a specific deck by ID"""
-    deck = await db.flash_decks.find_one({"id": deck_id})
+    deck = await db.flash_decks.find_one({"id": deck_id}, {"_id": 0})
     if not deck:
         raise HTTPException(status_code=404, detail="Deck not found")
-    return FlashCardDeck(**deck)
+    return ORJSONResponse(content=deck)
+
+@api_router.post("/decks/batch-get", response_model=None)
+async def batch_get_decks(request: DeckIdsRequest):
+    """Get several decks by ID in one call, in the requested order"""
+    cursor = db.flash_decks.find({"id": {"$in": request.deck_ids}}, {"_id": 0})
+    decks_by_id = {deck["id"]: deck for deck in await cursor.to_list(len(request.deck_ids))}
+    return ORJSONResponse(content=[decks_by_id[deck_id] for deck_id in request.deck_ids if deck_id in decks_by_id])
+
+@api_router.post("/decks/batch-delete")
+async def batch_delete_decks(request: DeckIdsRequest):
+    """Delete several decks by ID in one call"""
+    result = await db.flash_decks.delete_many({"id": {"$in": request.deck_ids}})
+    return {"message": "Decks deleted successfully", "deleted_count": result.deleted_count}
 
 @api_router.delete("/decks/{deck_id}")
 async def delete_deck(deck_id: str):
@@ -252,103 +367,189 @@ async def delete_deck(deck_id: str):
         raise HTTPException(status_code=404, detail="Deck not found")
     return {"message": "Deck deleted successfully"}
 
+async def iter_export_decks(deck_ids: List[str], limit: int = 0) -> AsyncIterator[FlashCardDeck]:
+    """Yield the decks to export, streaming from the cursor when exporting all decks"""
+    if deck_ids:
+        # Export specific decks
+        cursor = db.flash_decks.find({"id": {"$in": deck_ids}}, {"_id": 0}).batch_size(min(len(deck_ids), 500))
+        decks_by_id = {deck["id"]: deck for deck in await cursor.to_list(len(deck_ids))}
+        # Keep the order the decks were requested in
+        for deck_id in deck_ids:
+            if deck_id in decks_by_id:
+                yield construct_deck(decks_by_id[deck_id])
+    else:
+        # Export all decks (a limit of 0 means no limit)
+        async for deck in db.flash_decks.find({}, {"_id": 0}).limit(limit).batch_size(50):
+            yield construct_deck(deck)
+
+async def prepend_deck(first_deck: FlashCardDeck, decks: AsyncIterator[FlashCardDeck]) -> AsyncIterator[FlashCardDeck]:
+    """Re-attach a deck taken off the front of an iterator"""
+    yield first_deck
+    async for deck in decks:
+        yield deck
+
+@api_router.get("/export/formats")
+async def get_export_formats():
+    """List the supported export formats"""
+    return {"formats": list(EXPORT_FORMATS)}
+
 @api_router.post("/export")
 async def export_decks(request: ExportRequest):
     """Export flash card decks in various formats"""
     try:
-        # Get decks to export
-        if request.deck_ids:
-            # Export specific decks
-            decks_data = []
-            for deck_id in request.deck_ids:
-                deck = await db.flash_decks.find_one({"id": deck_id})
-                if deck:
-                    decks_data.append(deck)
-        else:
-            # Export all decks
-            decks_data = await db.flash_decks.find().to_list(1000)
+        export_format = request.format.lower()
+        if export_format not in EXPORT_FORMATS:
+            raise HTTPException(status_code=400, detail="Unsupported export format")
 
-        if not decks_data:
+        # CSV is written row by row, so it can stream every deck; JSON and PDF are built in memory
+        decks_iter = iter_export_decks(request.deck_ids, limit=0 if export_format == "csv" else 1000)
+        first_deck = await anext(decks_iter, None)
+        if first_deck is None:
             raise HTTPException(status_code=404, detail="No decks found to export")
 
-        # Convert to FlashCardDeck objects
-        decks = [FlashCardDeck(**deck) for deck in decks_data]
+        if export_format == "csv":
+            return export_to_csv(prepend_deck(first_deck, decks_iter))
 
-        if request.format.lower() == "json":
+        decks = [first_deck] + [deck async for deck in decks_iter]
+        if export_format == "json":
             return export_to_json(decks)
-        elif request.format.lower() == "csv":
-            return export_to_csv(decks)
-        elif request.format.lower() == "pdf":
-            return export_to_pdf(decks)
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported export format")
+        # ReportLab rendering is CPU-bound; keep it off the event loop
+        return await asyncio.to_thread(export_to_pdf, decks)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
 
 def export_to_json(decks: List[FlashCardDeck]):
     """Export decks to JSON format"""
+    now = datetime.utcnow()
     export_data = {
-        "export_date": datetime.utcnow().isoformat(),
+        "export_date": now.isoformat(),
         "total_decks": len(decks),
         "total_cards": sum(len(deck.cards) for deck in decks),
-        "decks": [deck.dict() for deck in decks]
+        "decks": [deck.model_dump(mode='python') for deck in decks]
     }
     
-    json_content = json.dumps(export_data, indent=2, default=str)
+    # Datetimes go through default=str so created_at keeps the "YYYY-MM-DD HH:MM:SS.ffffff" format clients already parse
+    json_content = orjson.dumps(export_data, option=orjson.OPT_INDENT_2 | orjson.OPT_PASSTHROUGH_DATETIME, default=str)
     
     return Response(
         content=json_content,
         media_type="application/json",
-        headers={"Content-Disposition": f"attachment; filename=flashcards_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"}
+        headers={"Content-Disposition": f"attachment; filename=flashcards_export_{now.strftime('%Y%m%d_%H%M%S')}.json"}
     )
 
-def export_to_csv(decks: List[FlashCardDeck]):
+def export_to_csv(decks: AsyncIterator[FlashCardDeck]):
     """Export decks to CSV format"""
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow(['Deck Name', 'Topic', 'Language', 'Card Front', 'Card Back', 'Created Date'])
-    
-    # Write data
-    for deck in decks:
-        for card in deck.cards:
-            writer.writerow([
-                deck.name,
-                deck.topic,
-                deck.language,
-                card.front,
-                card.back,
-                card.created_at.strftime('%Y-%m-%d %H:%M:%S') if card.created_at else ''
-            ])
-    
-    csv_content = output.getvalue()
-    output.close()
-    
-    return Response(
-        content=csv_content,
+    now = datetime.utcnow()
+    async def csv_rows():
+        # Reuse one small buffer, yielding and resetting it after every row
+        output = io.StringIO()
+        writer = csv.writer(output)
+
+        # Write header
+        writer.writerow(['Deck Name', 'Topic', 'Language', 'Card Front', 'Card Back', 'Created Date'])
+        yield output.getvalue()
+
+        # Write data
+        async for deck in decks:
+            for card in deck.cards:
+                output.seek(0)
+                output.truncate()
+                writer.writerow([
+                    deck.name,
+                    deck.topic,
+                    deck.language,
+                    card.front,
+                    card.back,
+                    card.created_at.strftime('%Y-%m-%d %H:%M:%S') if card.created_at else ''
+                ])
+                yield output.getvalue()
+
+        output.close()
+
+    return StreamingResponse(
+        csv_rows(),
         media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename=flashcards_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"}
+        headers={"Content-Disposition": f"attachment; filename=flashcards_export_{now.strftime('%Y%m%d_%H%M%S')}.csv"}
     )
 
+# PDF fonts for scripts Helvetica cannot render, registered on the first PDF export.
+# ReportLab is imported lazily so it stays out of startup time and memory until needed.
+# Only ReportLab's built-in CID fonts are used, so no font files have to ship with the backend.
+PDF_CID_FONTS = {
+    "chinese": "STSong-Light",
+    "japanese": "HeiseiMin-W3"
+}
+
+@lru_cache(maxsize=1)
+def register_pdf_fonts() -> Dict[str, str]:
+    """Register the CJK fonts and return a language -> font name map"""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+
+    for font_name in set(PDF_CID_FONTS.values()):
+        pdfmetrics.registerFont(UnicodeCIDFont(font_name))
+    return dict(PDF_CID_FONTS)
+
+@lru_cache(maxsize=1)
+def get_pdf_base_styles():
+    """Return ReportLab's sample stylesheet, built once"""
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    return getSampleStyleSheet()
+
+# Keyed by (font name, role) so arbitrary language strings can't grow the cache
+_pdf_styles: Dict[Tuple[str, str], "ParagraphStyle"] = {}
+
+def get_pdf_style(language: str, role: str) -> "ParagraphStyle":
+    """Return the cached paragraph style for a deck language and text role"""
+    font_name = register_pdf_fonts().get(language.lower())
+    key = (font_name or "default", role)
+    style = _pdf_styles.get(key)
+    if style is None:
+        from reportlab.lib.styles import ParagraphStyle
+
+        base_styles = get_pdf_base_styles()
+        if role == "heading":
+            style = ParagraphStyle(f'CustomHeading-{key[0]}', parent=base_styles['Heading1'], fontSize=16, spaceAfter=12)
+        elif role == "front":
+            style = ParagraphStyle(f'CardFront-{key[0]}', parent=base_styles['Normal'], fontSize=12, fontName='Helvetica-Bold')
+        else:
+            style = ParagraphStyle(f'CardBack-{key[0]}', parent=base_styles['Normal'], fontSize=10)
+        if font_name:
+            style.fontName = font_name
+        _pdf_styles[key] = style
+    return style
+
 def export_to_pdf(decks: List[FlashCardDeck]):
     """Export decks to PDF format"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle
+
+    now = datetime.utcnow()
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4)
     
     # Get styles
-    styles = getSampleStyleSheet()
+    styles = get_pdf_base_styles()
     title_style = ParagraphStyle('CustomTitle', parent=styles['Title'], fontSize=24, spaceAfter=30)
-    heading_style = ParagraphStyle('CustomHeading', parent=styles['Heading1'], fontSize=16, spaceAfter=12)
-    front_style = ParagraphStyle('CardFront', parent=styles['Normal'], fontSize=12, fontName='Helvetica-Bold', spaceAfter=6)
-    back_style = ParagraphStyle('CardBack', parent=styles['Normal'], fontSize=10, spaceAfter=12)
+    card_table_style = TableStyle([
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ])
     
     story = []
     
     # Add title
     story.append(Paragraph("Flash Cards Export", title_style))
-    story.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']))
+    story.append(Paragraph(f"Generated on: {now.strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']))
     story.append(Paragraph(f"Total Decks: {len(decks)}", styles['Normal']))
     story.append(Paragraph(f"Total Cards: {sum(len(deck.cards) for deck in decks)}", styles['Normal']))
     story.append(Spacer(1, 20))
@@ -358,18 +559,23 @@ def export_to_pdf(decks: List[FlashCardDeck]):
         if deck_idx > 0:
             story.append(PageBreak())
         
-        # Deck header
+        # Deck header, with fonts matching the deck language
+        heading_style = get_pdf_style(deck.language, "heading")
+        front_style = get_pdf_style(deck.language, "front")
+        back_style = get_pdf_style(deck.language, "back")
         story.append(Paragraph(f"Deck: {deck.name}", heading_style))
-        story.append(Paragraph(f"Topic: {deck.topic} | Language: {deck.language.title()}", styles['Normal']))
+        story.append(Paragraph(f"Topic: {deck.topic} | Language: {deck.language.title()}", back_style))
         story.append(Paragraph(f"Cards: {len(deck.cards)}", styles['Normal']))
         story.append(Spacer(1, 12))
         
-        # Add cards
-        for card_idx, card in enumerate(deck.cards):
-            story.append(Paragraph(f"Card {card_idx + 1}:", styles['Heading2']))
-            story.append(Paragraph(f"Front: {card.front}", front_style))
-            story.append(Paragraph(f"Back: {card.back}", back_style))
-            story.append(Spacer(1, 8))
+        # Add cards as a single table, one row per card; splitInRow lets a long card continue on the next page
+        card_rows = [["#", "Front", "Back"]] + [
+            [str(card_idx + 1), Paragraph(card.front, front_style), Paragraph(card.back, back_style)]
+            for card_idx, card in enumerate(deck.cards)
+        ]
+        cards_table = Table(card_rows, colWidths=[0.4 * inch, 2 * inch, 3.8 * inch], repeatRows=1, splitInRow=1)
+        cards_table.setStyle(card_table_style)
+        story.append(cards_table)
     
     # Build PDF
     doc.build(story)
@@ -380,7 +586,7 @@ def export_to_pdf(decks: List[FlashCardDeck]):
     return Response(
         content=pdf_content,
         media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename=flashcards_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"}
+        headers={"Content-Disposition": f"attachment; filename=flashcards_export_{now.strftime('%Y%m%d_%H%M%S')}.pdf"}
     )
 
 # Include the router in the main app
@@ -401,6 +607,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def create_db_indexes():
+    # Decks and status checks are looked up by their UUID "id" field
+    await db.flash_decks.create_index("id", unique=True)
+    await db.status_checks.create_index("id", unique=True)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
+    await sutra_http_client.aclose()
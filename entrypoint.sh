@@ -5,8 +5,11 @@ set -e
 cd /backend || { echo "Backend directory not found"; exit 1; }
 
 echo "Starting FastAPI backend"
-# Start Uvicorn with proper host binding
-uvicorn server:app --host 0.0.0.0 --port 8001 &
+# Start Uvicorn with proper host binding, 2 workers unless WEB_CONCURRENCY is set.
+# Each worker has its own Sutra semaphore and caches, so up to WEB_CONCURRENCY x LLM_CONCURRENCY
+# Sutra calls can be in flight at once; lower LLM_CONCURRENCY when raising the worker count.
+uvicorn server:app --host 0.0.0.0 --port 8001 \
+    --workers "${WEB_CONCURRENCY:-2}" --loop uvloop --http httptools &
 BACKEND_PID=$!
 
 echo "Waiting for backend to start..."
@@ -0,0 +1,27 @@
+import os
+import sys
+import unittest
+
+# server.py reads the Mongo settings at import time; the client connects lazily, so placeholders are enough here
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'test_database')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from server import FlashCard, FlashCardDeck, export_to_pdf
+
+
+class PdfExportTest(unittest.TestCase):
+    def test_card_taller_than_a_page(self):
+        """A card whose back runs past one page must continue on the next instead of failing the export"""
+        back = " ".join(f"word{i}" for i in range(800))
+        card = FlashCard(front="Long card", back=back, topic="Overflow", language="english")
+        deck = FlashCardDeck(name="Overflow", topic="Overflow", language="english", cards=[card])
+
+        response = export_to_pdf([deck])
+
+        self.assertEqual(response.media_type, "application/pdf")
+        self.assertTrue(response.body.startswith(b"%PDF"))
+
+
+if __name__ == '__main__':
+    unittest.main()